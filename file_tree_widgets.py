@@ -2,6 +2,7 @@
 This module implements QTreeWidget-based file tree widgets for displaying lockable or locked
 files.
 """
+import contextlib
 import os
 import re
 from functools import partial
@@ -10,7 +11,7 @@ from typing import override
 import pyperclip
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
-from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem, QTreeWidgetItemIterator, QMenu
+from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem, QMenu
 
 import lfs_lock_parser
 import pyqt_helpers
@@ -18,6 +19,21 @@ from settings import Settings
 import utility
 
 
+def _get_lock_mode_file_filter_pattern():
+    """
+    This function returns the compiled regex for the lock mode file filter setting. The compiled
+    pattern is cached and only recompiled when the setting changes.
+    :return: The compiled regex pattern
+    """
+    regex = Settings.lock_mode_file_filter
+    cached = getattr(_get_lock_mode_file_filter_pattern, "cache", None)
+    if cached is None or cached[0] != regex:
+        cached = (regex, re.compile(regex))
+        _get_lock_mode_file_filter_pattern.cache = cached
+
+    return cached[1]
+
+
 class FileTreeWidgetItem(QTreeWidgetItem):
     # pylint: disable=too-few-public-methods
     """
@@ -29,6 +45,9 @@ class FileTreeWidgetItem(QTreeWidgetItem):
 
         self.is_directory: bool
         self.relative_path: str
+        # Lowercased relative path, cached on files so the tree filter does not re-lowercase
+        # every path per keystroke
+        self.relative_path_lower: str
 
 
 class LockDataFileTreeWidgetItem(FileTreeWidgetItem):
@@ -54,6 +73,36 @@ class FileTreeWidgetBase(QTreeWidget):
 
         self.current_selection = []
 
+        # Flat caches of all items created by populate() so that queries can iterate plain
+        # Python lists instead of paying the per-node cost of a QTreeWidgetItemIterator.
+        self._all_items = []
+        self._leaf_items = []
+
+        # The most recently applied filter string, so visibility can be recomputed when other
+        # filter criteria change
+        self._filter_string = ""
+
+    @contextlib.contextmanager
+    def _batch_updates(self):
+        """
+        A context manager which suspends repaints, change signals and sorting while many items
+        are mutated, collapsing the per-item redraw cost into a single repaint at the end.
+        """
+        self.setUpdatesEnabled(False)
+        self.blockSignals(True)
+
+        # Sorting after every insertion is quadratic; sort once when the batch completes
+        was_sorting_enabled = self.isSortingEnabled()
+        self.setSortingEnabled(False)
+
+        try:
+            yield
+        finally:
+            self.setSortingEnabled(was_sorting_enabled)
+            self.blockSignals(False)
+            self.setUpdatesEnabled(True)
+            self.viewport().update()
+
     def _notify_copy_transaction(self, num_selected_files: int):
         dialog = pyqt_helpers.NotificationDialog(
             f"Copied {num_selected_files} selected files to clipboard", 500, 40)
@@ -65,76 +114,79 @@ class FileTreeWidgetBase(QTreeWidget):
         if len(selected_items) > 0:
             self.current_selection = selected_items
 
+    def _iter_checked_leaves(self):
+        # The leaf cache only ever contains non-directory items, so no is_directory check is
+        # needed here. Hidden items are skipped: filters only toggle visibility instead of
+        # rebuilding the tree, and operations must never act on locks the current view hides.
+        return (item for item in self._leaf_items
+                if item.checkState(0) == Qt.Checked and not item.isHidden())
+
     def get_selected_items(self):
         """
-        This function retrieves all checked items, except directories.
-        :return: All checked non-directory QTreeWidgetItems
+        This function retrieves all checked items, except directories and items hidden by the
+        active filters.
+        :return: All checked visible non-directory QTreeWidgetItems
         """
-        result = []
+        return list(self._iter_checked_leaves())
 
-        iterator = QTreeWidgetItemIterator(self)
-        while iterator.value():
-            item = iterator.value()
-            if not item.is_directory and item.checkState(0) == Qt.Checked:
-                result.append(item)
-
-            iterator += 1
-
-        return result
-
-    def set_selected_items(self, items_to_select: list):
+    def set_selected_items(self, items_to_select):
         """
         This function allows the current selection to be overwritten.
-        :param items_to_select: A list of items to select which can either be a list of relative
-        file paths or a list of LockDataFileTreeWidgetItems
+        :param items_to_select: An iterable of items to select which can either contain relative
+        file paths, lock ids or LockDataFileTreeWidgetItems
+        :return: Returns the number of items which were actually selected
         """
+        num_selected = 0
+
         if len(items_to_select) > 0:
-            iterator = QTreeWidgetItemIterator(self)
-            while iterator.value():
-                item = iterator.value()
+            to_select = set(items_to_select)
+
+            with self._batch_updates():
+                for item in self._all_items:
+                    # Items hidden by the owner or text filter are out of reach; selecting
+                    # them would let operations act on locks the user cannot see
+                    if item.isHidden():
+                        continue
+
+                    needs_selection = False
 
-                needs_selection = False
+                    # For applying selections in unlocking mode
+                    if isinstance(item, LockDataFileTreeWidgetItem):
+                        needs_selection = (item.lock_data.lock_id_str in to_select or
+                                           item.lock_data.relative_path in to_select)
+                    # For applying selections in locking mode
+                    elif isinstance(item, FileTreeWidgetItem):
+                        needs_selection = item.relative_path in to_select
 
-                # For applying selections in unlocking mode
-                if isinstance(item, LockDataFileTreeWidgetItem):
-                    needs_selection = (item.lock_data.lock_id in items_to_select or
-                                       item.lock_data.relative_path in items_to_select)
-                # For applying selections in locking mode
-                elif isinstance(item, FileTreeWidgetItem):
-                    needs_selection = item.relative_path in items_to_select
+                    if needs_selection:
+                        num_selected += 1
 
-                # Update check state
-                item.setCheckState(0,
-                                   Qt.Checked if needs_selection else
-                                   Qt.Unchecked)
+                    # Update check state
+                    item.setCheckState(0,
+                                       Qt.Checked if needs_selection else
+                                       Qt.Unchecked)
 
-                iterator += 1
+            # The batch suppressed all intermediate signals, so announce the new selection once
+            self.itemSelectionChanged.emit()
+
+        return num_selected
 
     def unselect_all_items(self):
         """
         This function allows to clear the current selection.
         """
-        iterator = QTreeWidgetItemIterator(self)
-        while iterator.value():
-            item = iterator.value()
-            item.setCheckState(0, Qt.Unchecked)
+        # Only touch the leaves and let the tristate flag aggregate parents; clearing every
+        # directory as well would re-trigger Qt's check-state propagation per node.
+        with self._batch_updates():
+            for item in self._leaf_items:
+                item.setCheckState(0, Qt.Unchecked)
 
     def get_selected_file_paths(self):
         """
         This function retrieves the relative file paths of all selected files.
         :return: All relative file paths
         """
-        result = []
-
-        iterator = QTreeWidgetItemIterator(self)
-        while iterator.value():
-            item = iterator.value()
-            if not item.is_directory and item.checkState(0) == Qt.Checked:
-                result.append(item.relative_path)
-
-            iterator += 1
-
-        return result
+        return [item.relative_path for item in self._iter_checked_leaves()]
 
     def copy_relative_file_path_of_tree_selection(self):
         """
@@ -150,70 +202,88 @@ class FileTreeWidgetBase(QTreeWidget):
 
         return string_to_copy
 
-    def _has_non_directory_child(self, item: QTreeWidgetItem):
-        # Check if the item has any children
-        if item.childCount() > 0:
-            # Iterate over the item's children
-            for i in range(item.childCount()):
-                child_item = item.child(i)
-                if not child_item.is_directory:
-                    # Found a non-directory child
-                    return True
-
-                # Recursively check the child item's children
-                if self._has_non_directory_child(child_item):
-                    return True
-        return False
+    # pylint: disable=unused-argument
+    def _leaf_passes_extra_filters(self, item: FileTreeWidgetItem):
+        """
+        A hook for subclasses to veto leaf visibility beyond the filter string, e.g. by lock
+        owner.
+        :param item: The leaf item to check
+        :return: Returns true, if the item may be shown
+        """
+        return True
 
-    def hide_empty_folders(self):
+    def apply_filter(self, filter_string: str):
         """
-        This function hides all empty folders in the file tree widget.
+        This function filters the resident tree in place by toggling item visibility instead of
+        rebuilding all items. Directories are only shown if at least one matching file remains
+        visible below them.
+        :param filter_string: A string to filter the tree by which is used by another search
+        field widget
         """
-        iterator = QTreeWidgetItemIterator(self)
-        while iterator.value():
-            item = iterator.value()
-            if not item.isHidden():
-                if isinstance(item, FileTreeWidgetItem):
-                    if item.is_directory:
-                        if not self._has_non_directory_child(item):
-                            item.setHidden(True)
+        self._filter_string = filter_string
+
+        requires_filter = filter_string != ""
+        filter_string_lower = filter_string.lower()
 
-            iterator += 1
+        with self._batch_updates():
+            # Hide all directories first; they are revealed again by their visible files below
+            for item in self._all_items:
+                if item.is_directory:
+                    item.setHidden(True)
+
+            for item in self._leaf_items:
+                matched = ((not requires_filter or
+                            filter_string_lower in item.relative_path_lower) and
+                           self._leaf_passes_extra_filters(item))
+                item.setHidden(not matched)
+
+                if matched:
+                    ancestor = item.parent()
+                    while ancestor is not None and ancestor.isHidden():
+                        ancestor.setHidden(False)
+                        ancestor = ancestor.parent()
 
     def expand_tree_selection(self):
         """
         This function can be used to recursively expand the file tree relative to the element
         that was selected.
         """
-        FileTreeWidgetBase.set_expanded_recursively(True, self.currentItem())
+        self.set_expanded_recursively(True, self.currentItem())
 
     def collapse_tree_selection(self):
         """
         This function can be used to recursively collapse the file tree relative to the element
         that was selected.
         """
-        FileTreeWidgetBase.set_expanded_recursively(False, self.currentItem())
+        self.set_expanded_recursively(False, self.currentItem())
 
-    @staticmethod
-    def set_expanded_recursively(should_expand, item: QTreeWidgetItem):
+    def set_expanded_recursively(self, should_expand, item: QTreeWidgetItem):
         """
         This function can expand or collapse all children of the given item recursively.
         :param should_expand: If true, all children will expand
         :param item: The item whose children are considered
         """
-        stack = []
-        selected_item = item
-        stack.append(selected_item)
+        if should_expand:
+            # Let Qt walk the subtree in C++ instead of one setExpanded call per node
+            index = self.indexFromItem(item)
+            if index.isValid():
+                self.expandRecursively(index)
+            else:
+                # The invisible root item has no valid index; expand the whole tree
+                self.expandAll()
 
-        selected_item.setExpanded(should_expand)
+            return
+
+        with self._batch_updates():
+            stack = [item]
 
-        while stack:
-            item = stack.pop()
-            item.setExpanded(should_expand)
+            while stack:
+                item = stack.pop()
+                item.setExpanded(False)
 
-            for index in range(item.childCount()):
-                child_item = item.child(index)
-                stack.append(child_item)
+                for index in range(item.childCount()):
+                    child_item = item.child(index)
+                    stack.append(child_item)
 
     def enforce_default_expansion_depth(self):
         """
@@ -223,19 +293,8 @@ class FileTreeWidgetBase(QTreeWidget):
         if Settings.default_expansion_depth <= 0:
             return
 
-        root_item = self.invisibleRootItem()
-        stack = [(root_item, 0)]
-
-        root_item.setExpanded(True)
-
-        while stack:
-            item, current_depth = stack.pop()
-            item.setExpanded(True)
-
-            if current_depth < Settings.default_expansion_depth:
-                for i in range(item.childCount()):
-                    child_item = item.child(i)
-                    stack.append((child_item, current_depth + 1))
+        # expandToDepth counts the top level as depth 0 and performs the walk in C++
+        self.expandToDepth(Settings.default_expansion_depth - 1)
 
     def request_locking_operation(self, should_lock: bool):
         """
@@ -278,9 +337,24 @@ class LockingFileTreeWidget(FileTreeWidgetBase):
         self.locked_files = []
         self.base_name: str
 
+        # Build the context menu once; contextMenuEvent only toggles action visibility
+        self._context_menu = QMenu(self)
+
+        self._expand_action = self._context_menu.addAction("Expand children")
+        self._expand_action.triggered.connect(self.expand_tree_selection)
+
+        self._collapse_action = self._context_menu.addAction("Collapse children")
+        self._collapse_action.triggered.connect(self.collapse_tree_selection)
+
+        copy_relative_file_path_action = self._context_menu.addAction("Copy relative file path")
+        copy_relative_file_path_action.triggered.connect(
+            self.copy_relative_file_path_of_tree_selection)
+
+        request_lock_action = self._context_menu.addAction("Copy locking command")
+        request_lock_action.triggered.connect(partial(self.request_locking_operation, True))
+
     def populate(self, lock_data: [lfs_lock_parser.LfsLockData], default_expansion_depth: int,
                  filter_string=""):
-        # pylint: disable=too-many-locals,too-many-branches
         """
         This function populates the tree, i.e. it parses the non-locked files, so that it can be
         displayed in the tree widget.
@@ -290,35 +364,67 @@ class LockingFileTreeWidget(FileTreeWidgetBase):
         :param filter_string: A string to filter the tree by which is used by another search
         field widget
         """
+        self._filter_string = filter_string
+
+        # Suppress per-item repaints and model-change signals while the tree is rebuilt
+        with self._batch_updates():
+            self._populate_tree(lock_data, default_expansion_depth, filter_string)
+
+    def _populate_tree(self, lock_data: [lfs_lock_parser.LfsLockData],
+                       default_expansion_depth: int, filter_string: str):
+        # pylint: disable=too-many-locals,too-many-branches,too-many-statements
         self._cache_current_selection()
+        selected_paths = {selected_item.relative_path for selected_item in self.current_selection}
 
-        path_map = {}
+        # A trie keyed by path segment storing (item, children) pairs. Hashing one short
+        # segment per level is cheaper than hashing the full accumulated path.
+        path_trie = {}
 
         lfs_tracked_files = utility.get_git_lfs_tracked_files()
-        regex = Settings.lock_mode_file_filter
-        lfs_tracked_files = [s for s in lfs_tracked_files if re.match(regex, s)]
+        pattern = _get_lock_mode_file_filter_pattern()
+        # The tracked files are cached as a frozenset, so sort for a stable display order;
+        # iterating the set directly would reshuffle the tree on every launch
+        lfs_tracked_files = sorted(filter(pattern.match, lfs_tracked_files))
 
         self.clear()
+        self._all_items.clear()
+        self._leaf_items.clear()
+
+        # Reuse the index the parser built on its worker thread for this data revision;
+        # stat-ing the project tree here would block the GUI thread
+        known_kinds = lfs_lock_parser.LfsLockParser.path_kind_index
+
+        locked_paths = frozenset(data.relative_path for data in lock_data)
 
-        project_root = utility.get_project_root_directory()
+        requires_filter = filter_string != ""
+        filter_string_lower = filter_string.lower()
 
         # pylint: disable=too-many-nested-blocks
         for tracked_file in lfs_tracked_files:
             file_path = tracked_file
+
+            # Skip already locked files before walking their path components
+            # @NOTE: This also prevents displaying empty directories
+            if file_path in locked_paths:
+                continue
+
+            # Filter-rejected files incur no per-component work either
+            if requires_filter and filter_string_lower not in file_path.lower():
+                continue
+
             path_parts = file_path.split("/")
 
             parent_item = self.invisibleRootItem()
-            path_so_far = ""
+            parts_so_far = []
+            depth = 0
+            trie_node = path_trie
 
             for part in path_parts:
-                path_so_far += part
-                if path_so_far not in path_map:
-                    is_directory = os.path.isdir(project_root + path_so_far)
-
-                    # Skip already locked files
-                    # @NOTE: This also prevents displaying empty directories
-                    if file_path in [data.relative_path for data in lock_data]:
-                        continue
+                parts_so_far.append(part)
+                trie_entry = trie_node.get(part)
+                if trie_entry is None:
+                    path_so_far = "/".join(parts_so_far)
+                    is_directory = known_kinds.get(path_so_far) == 'd'
 
                     item: FileTreeWidgetItem
 
@@ -328,38 +434,35 @@ class LockingFileTreeWidget(FileTreeWidgetBase):
                         item.is_directory = True
                         item.relative_path = path_so_far
                     else:
-                        matched_filter = False
-                        requires_filter = filter_string != ""
-                        if requires_filter:
-                            if filter_string.lower() in file_path.lower():
-                                matched_filter = True
-
-                        if not requires_filter or (requires_filter and matched_filter):
-                            item = FileTreeWidgetItem(parent_item, [part])
-                            item.is_directory = False
-                            item.relative_path = file_path
-                        else:
-                            continue
+                        item = FileTreeWidgetItem(parent_item, [part])
+                        item.is_directory = False
+                        item.relative_path = file_path
+                        item.relative_path_lower = file_path.lower()
 
                     assert item
+                    self._all_items.append(item)
+                    if not item.is_directory:
+                        self._leaf_items.append(item)
+
                     item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
                     item.setCheckState(0, Qt.Unchecked)
 
-                    if item.relative_path in [selected_item.relative_path for selected_item in
-                                              self.current_selection]:
+                    if item.relative_path in selected_paths:
                         item.setCheckState(0, Qt.Checked)
 
                     # Expand first
-                    depth = path_so_far.count("/")
                     if depth < default_expansion_depth:
                         item.setExpanded(True)
 
-                    path_map[path_so_far] = item
+                    child_trie = {}
+                    trie_node[part] = (item, child_trie)
+                    trie_node = child_trie
                     parent_item = item
                 else:
-                    parent_item = path_map[path_so_far]
+                    parent_item = trie_entry[0]
+                    trie_node = trie_entry[1]
 
-                path_so_far += "/"
+                depth += 1
 
     @override
     def contextMenuEvent(self, event):
@@ -372,27 +475,14 @@ class LockingFileTreeWidget(FileTreeWidgetBase):
         if item is not None:
             is_directory = item.is_directory
 
-            menu = QMenu(self)
-            if is_directory:
-                expand_action = menu.addAction("Expand children")
-                expand_action.triggered.connect(self.expand_tree_selection)
+            self._expand_action.setVisible(is_directory)
+            self._collapse_action.setVisible(is_directory)
 
-                collapse_action = menu.addAction("Collapse children")
-                collapse_action.triggered.connect(self.collapse_tree_selection)
-            else:
-                pass
-
-            copy_relative_file_path_action = menu.addAction("Copy relative file path")
-            copy_relative_file_path_action.triggered.connect(
-                self.copy_relative_file_path_of_tree_selection)
-
-            request_unlock_action = menu.addAction("Copy locking command")
-            request_unlock_action.triggered.connect(partial(self.request_locking_operation, True))
-
-            menu.exec_(self.mapToGlobal(event.pos()))
+            self._context_menu.exec_(self.mapToGlobal(event.pos()))
 
 
 class UnlockingFileTreeWidget(FileTreeWidgetBase):
+    # pylint: disable=too-many-instance-attributes
     """
     This file tree widget is specialised for displaying file locks and their associated
     information and handling user selection.
@@ -407,48 +497,125 @@ class UnlockingFileTreeWidget(FileTreeWidgetBase):
 
         self.selected_git_user = ""
 
+        # The lock owner the tree is currently restricted to; 'All' shows every lock
+        self._owner_filter = "All"
+
+        # Load the warning icon once; constructing it per item would decode the PNG repeatedly
+        self._warning_icon = QIcon(utility.resource_path("resources/icons/warning.png"))
+
+        # Build the context menu once; contextMenuEvent only toggles action visibility
+        self._context_menu = QMenu(self)
+
+        self._expand_action = self._context_menu.addAction("Expand children")
+        self._expand_action.triggered.connect(self.expand_tree_selection)
+
+        self._collapse_action = self._context_menu.addAction("Collapse children")
+        self._collapse_action.triggered.connect(self.collapse_tree_selection)
+
+        self._copy_lock_id_action = self._context_menu.addAction("Copy lock ID")
+        self._copy_lock_id_action.triggered.connect(self.copy_lock_id_of_tree_selection)
+
+        self._copy_relative_file_path_action = self._context_menu.addAction(
+            "Copy relative file path")
+        self._copy_relative_file_path_action.triggered.connect(
+            self.copy_relative_file_path_of_tree_selection)
+
+        self._request_unlock_action = self._context_menu.addAction("Copy unlocking command")
+        self._request_unlock_action.triggered.connect(
+            partial(self.request_locking_operation, False))
+
+        self._request_lock_action = self._context_menu.addAction("Copy locking command")
+        self._request_lock_action.triggered.connect(partial(self.request_locking_operation, True))
+
     def populate(self, lock_data: [lfs_lock_parser.LfsLockData], selected_git_user: str,
                  default_expansion_depth: int, filter_string=""):
-        # pylint: disable=too-many-locals,too-many-branches,too-many-statements
         """
-        This function populates the tree, i.e. it parses the file locks, so that it can be 
+        This function populates the tree, i.e. it parses the file locks, so that it can be
         displayed in the tree widget. The function only displays locks of the specified Git user.
         :param lock_data: The LFS lock data to display
         :param selected_git_user: The currently selected Git user
-        :param default_expansion_depth: The tree's default expansion depth which will be enforced 
+        :param default_expansion_depth: The tree's default expansion depth which will be enforced
         everytime this function is called.
-        :param filter_string: A string to filter the tree by which is used by another search 
+        :param filter_string: A string to filter the tree by which is used by another search
         field widget.
         """
+        self._filter_string = filter_string
+
+        # Suppress per-item repaints and model-change signals while the tree is rebuilt
+        with self._batch_updates():
+            self._populate_tree(lock_data, selected_git_user, default_expansion_depth,
+                                filter_string)
 
+    @override
+    def _leaf_passes_extra_filters(self, item: FileTreeWidgetItem):
+        return (self._owner_filter == "All" or
+                (isinstance(item, LockDataFileTreeWidgetItem) and
+                 item.lock_data.lock_owner == self._owner_filter))
+
+    def filter_by_owner(self, owner: str):
+        """
+        This function restricts the tree to locks of the given owner by toggling item visibility,
+        which avoids a full rebuild when the user flips the owner selection.
+        :param owner: The lock owner to display, or 'All' for every lock
+        """
+        self._owner_filter = owner
+        self.selected_git_user = owner
+
+        # Re-run the combined filter so the text filter keeps applying as well
+        self.apply_filter(self._filter_string)
+
+    def _populate_tree(self, lock_data: [lfs_lock_parser.LfsLockData], selected_git_user: str,
+                       default_expansion_depth: int, filter_string: str):
+        # pylint: disable=too-many-locals,too-many-branches,too-many-statements
         # Memorize current selection so we can restore it when filtering
         self._cache_current_selection()
+        selected_paths = {selected_item.relative_path for selected_item in self.current_selection}
 
         self.selected_git_user = selected_git_user
         self.clear()
+        self._all_items.clear()
+        self._leaf_items.clear()
 
-        project_root = utility.get_project_root_directory()
+        # Reuse the index the parser built on its worker thread for this data revision;
+        # stat-ing the project tree here would block the GUI thread
+        known_kinds = lfs_lock_parser.LfsLockParser.path_kind_index
 
-        path_map = {}
+        # A trie keyed by path segment storing (item, children) pairs. Hashing one short
+        # segment per level is cheaper than hashing the full accumulated path.
+        path_trie = {}
+
+        requires_filter = filter_string != ""
+        filter_string_lower = filter_string.lower()
 
         # pylint: disable=too-many-nested-blocks
         for data in lock_data:
             file_path = data.relative_path
+
+            # Only display content that is matching the selected user
+            if selected_git_user not in (data.lock_owner, 'All'):
+                continue
+
+            # Filter-rejected files incur no per-component work either
+            if requires_filter and filter_string_lower not in file_path.lower():
+                continue
+
             path_parts = file_path.split("/")
 
             parent_item = self.invisibleRootItem()
-            path_so_far = ""
+            parts_so_far = []
+            depth = 0
+            trie_node = path_trie
 
             for part in path_parts:
-                path_so_far += part
-                if path_so_far not in path_map:
-                    # Only display content that is matching the selected user
-                    if selected_git_user not in (data.lock_owner, 'All'):
-                        continue
+                parts_so_far.append(part)
+                trie_entry = trie_node.get(part)
+                if trie_entry is None:
+                    path_so_far = "/".join(parts_so_far)
 
                     # Do not populate meta-data fields if this is a directory
-                    is_directory = os.path.isdir(project_root + path_so_far)
-                    is_file = os.path.isfile(project_root + path_so_far)
+                    kind = known_kinds.get(path_so_far)
+                    is_directory = kind == 'd'
+                    is_file = kind == 'f'
 
                     # Assuming files all have a file ending
                     is_non_local_directory = not is_directory and not is_file and path_so_far.count(
@@ -460,67 +627,58 @@ class UnlockingFileTreeWidget(FileTreeWidgetBase):
 
                     text = part
                     owner = data.lock_owner if show_meta_data else ""
-                    lock_id = str(data.lock_id) if show_meta_data else ""
-
-                    item = None
+                    lock_id = data.lock_id_str if show_meta_data else ""
 
                     if show_meta_data:
-                        matched_filter = False
-                        requires_filter = filter_string != ""
-                        if requires_filter:
-                            if filter_string.lower() in file_path.lower():
-                                matched_filter = True
-
-                        if not requires_filter or (requires_filter and matched_filter):
-                            item = LockDataFileTreeWidgetItem(parent_item, [text, owner, lock_id])
-                            item.lock_data = data
-                            item.is_directory = False
-                            item.relative_path = file_path
+                        item = LockDataFileTreeWidgetItem(parent_item, [text, owner, lock_id])
+                        item.lock_data = data
+                        item.is_directory = False
+                        item.relative_path = file_path
+                        item.relative_path_lower = file_path.lower()
 
-                            if show_meta_data and not data.is_local_file:
-                                icon = QIcon(utility.resource_path("resources/icons/warning.png"))
-                                item.setIcon(0, icon)
+                        if not data.is_local_file:
+                            item.setIcon(0, self._warning_icon)
 
-                            if requires_filter:
-                                item.setExpanded(True)
+                        if requires_filter:
+                            item.setExpanded(True)
                     else:
                         item = FileTreeWidgetItem(parent_item, [text])
                         item.setFlags(item.flags() | Qt.ItemIsTristate)
                         item.is_directory = True
                         item.relative_path = path_so_far
 
-                    if isinstance(item, QTreeWidgetItem):
-                        item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
-                        item.setCheckState(0, Qt.Unchecked)
+                    self._all_items.append(item)
+                    if not item.is_directory:
+                        self._leaf_items.append(item)
 
-                        if show_meta_data and not data.is_local_file:
-                            item.setToolTip(0, "Warning: File does not exist locally")
+                    item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                    item.setCheckState(0, Qt.Unchecked)
+
+                    if show_meta_data and not data.is_local_file:
+                        item.setToolTip(0, "Warning: File does not exist locally")
 
-                        if item.relative_path in [selected_item.relative_path for selected_item in
-                                                  self.current_selection]:
-                            item.setCheckState(0, Qt.Checked)
+                    if item.relative_path in selected_paths:
+                        item.setCheckState(0, Qt.Checked)
 
                     # Expand first
-                    depth = path_so_far.count("/")
                     if depth < default_expansion_depth:
                         item.setExpanded(True)
 
-                    path_map[path_so_far] = item
+                    child_trie = {}
+                    trie_node[part] = (item, child_trie)
+                    trie_node = child_trie
                     parent_item = item
                 else:
-                    parent_item = path_map[path_so_far]
+                    parent_item = trie_entry[0]
+                    trie_node = trie_entry[1]
 
-                path_so_far += "/"
+                depth += 1
 
         selected_items_after_populating = self.get_selected_items()
         if len(selected_items_after_populating) == 0 and len(self.current_selection) > 0:
             # self.current_selection.clear()
             pass
 
-    def get_selected_file_paths(self):
-        selected_items = self.get_selected_items()
-        return [item.lock_data.relative_path for item in selected_items]
-
     @override
     def contextMenuEvent(self, event):
         # pylint: disable=invalid-name
@@ -532,33 +690,16 @@ class UnlockingFileTreeWidget(FileTreeWidgetBase):
         if item is not None:
             is_directory = item.is_directory
 
-            menu = QMenu(self)
-            if is_directory:
-                expand_action = menu.addAction("Expand children")
-                expand_action.triggered.connect(self.expand_tree_selection)
-
-                collapse_action = menu.addAction("Collapse children")
-                collapse_action.triggered.connect(self.collapse_tree_selection)
-            else:
-                pass
-
-            selected_items = self.get_selected_items()
-            if len(selected_items) > 0:
-                copy_lock_id_action = menu.addAction("Copy lock ID")
-                copy_lock_id_action.triggered.connect(self.copy_lock_id_of_tree_selection)
-
-                copy_relative_file_path_action = menu.addAction("Copy relative file path")
-                copy_relative_file_path_action.triggered.connect(
-                    self.copy_relative_file_path_of_tree_selection)
-
-                request_unlock_action = menu.addAction("Copy unlocking command")
-                request_unlock_action.triggered.connect(
-                    partial(self.request_locking_operation, False))
+            self._expand_action.setVisible(is_directory)
+            self._collapse_action.setVisible(is_directory)
 
-                request_lock_action = menu.addAction("Copy locking command")
-                request_lock_action.triggered.connect(partial(self.request_locking_operation, True))
+            has_selection = len(self.get_selected_items()) > 0
+            self._copy_lock_id_action.setVisible(has_selection)
+            self._copy_relative_file_path_action.setVisible(has_selection)
+            self._request_unlock_action.setVisible(has_selection)
+            self._request_lock_action.setVisible(has_selection)
 
-            menu.exec_(self.mapToGlobal(event.pos()))
+            self._context_menu.exec_(self.mapToGlobal(event.pos()))
 
     def copy_lock_id_of_tree_selection(self):
         """
@@ -570,14 +711,13 @@ class UnlockingFileTreeWidget(FileTreeWidgetBase):
 
         selected_items = self.get_selected_items()
         if len(selected_items) > 0:
-            for item in selected_items:
-                if isinstance(item, LockDataFileTreeWidgetItem):
-                    string_to_copy += " " + str(item.lock_data.lock_id)
+            string_to_copy = " ".join(item.lock_data.lock_id_str for item in selected_items
+                                      if isinstance(item, LockDataFileTreeWidgetItem))
         else:
             item = self.currentItem()
             if isinstance(item, LockDataFileTreeWidgetItem):
                 if not item.is_directory:
-                    string_to_copy = item.lock_data.lock_id
+                    string_to_copy = item.lock_data.lock_id_str
 
         if string_to_copy != "":
             pyperclip.copy(string_to_copy)
@@ -1,15 +1,20 @@
 """ This module implements a parser for Git LFS lock data and related types. """
-import os
 import dataclasses
+import re
+import weakref
 
 import utility
 from worker_thread import WorkerThread
 
+# Matches one line of 'git-lfs locks' output: "<path> <owner> ID:<number>"
+_LOCK_LINE_PATTERN = re.compile(r'(\S+)\s+(\S+)\s+ID:(\d+)')
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class LfsLockData:
     """
-    This type implements all data which can be retrieved from Git LFS file locks.
+    This type implements all data which can be retrieved from Git LFS file locks. Instances are
+    slotted and immutable since thousands of them may be kept alive per parse.
     """
     lock_id: int
     lock_owner: str
@@ -18,6 +23,11 @@ class LfsLockData:
     is_orphaned: bool
     # True, if file exists locally
     is_local_file: bool
+    # Cached string form of lock_id so consumers do not re-stringify per item
+    lock_id_str: str = dataclasses.field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "lock_id_str", str(self.lock_id))
 
 
 class LfsLockParser:
@@ -27,10 +37,32 @@ class LfsLockParser:
     """
     lock_data = []
     lock_owners = []
-    subscribers = []
+
+    # Weak references so destroyed widgets drop out automatically instead of being notified
+    # (or kept alive) forever; there is no unsubscribe path
+    subscribers = weakref.WeakSet()
+
+    # Index of lock data by relative path for O(1) lookups
+    _lock_data_by_path = {}
+
+    # Path-kind index ('d' or 'f') covering the locked and tracked paths. Rebuilt once per
+    # parse on the worker thread and shared with the tree populates, so no widget ever has to
+    # stat the project tree on the GUI thread.
+    path_kind_index = {}
 
     has_parsed_once = False
 
+    # Incremented whenever a parse produces data that differs from the previous parse, so
+    # subscribers can cheaply skip rebuilding their views after a no-op refresh
+    data_revision = 0
+
+    # True while a parse worker is in flight, used to coalesce duplicate requests
+    _is_parsing = False
+
+    # True if a parse was requested while one was already running. The in-flight parse may
+    # have read pre-request state, so another one is scheduled as soon as it completes.
+    _parse_pending = False
+
     @staticmethod
     def get_lock_owner_of_file(relative_file_path: str):
         """
@@ -49,58 +81,78 @@ class LfsLockParser:
         """
         This helper function retrieves the stored lock data of a given file.
         :param relative_file_path: The relative file path of a locked file
-        :return: The lock data of the file
+        :return: The lock data of the file, or None if the file is not locked
         """
         unquoted_file_path = relative_file_path.replace('"', '')
-
-        for lock_data in LfsLockParser.lock_data:
-            if isinstance(lock_data, LfsLockData):
-                if lock_data.relative_path == unquoted_file_path:
-                    return lock_data
-
-        return ""
+        return LfsLockParser._lock_data_by_path.get(unquoted_file_path)
 
     @staticmethod
     def get_lock_owners(lock_data: [LfsLockData]):
         """
         This function retrieves all unique LFS lock owners, i.e. all users who own file locks.
         :param lock_data: The LFS lock data to use
-        :return: Returns all unique LFS lock owners
+        :return: Returns all unique LFS lock owners as a set
         """
-        owners = set()
-
-        for data in lock_data:
-            owners.add(data.lock_owner)
-
-        return list(owners)
+        # Returned as the set itself; callers that need an order sort it once themselves
+        return {data.lock_owner for data in lock_data}
 
     @staticmethod
     def subscribe_to_update(subscriber):
         """
-        This function is used to have an object subscribe to parsing updates of this class.
+        This function is used to have an object subscribe to parsing updates of this class. The
+        subscriber is referenced weakly, so it does not need to unsubscribe on destruction.
         :param subscriber: The object that wants to be notified
         """
-        LfsLockParser.subscribers.append(subscriber)
+        LfsLockParser.subscribers.add(subscriber)
+
+    @staticmethod
+    def _run_pending_parse():
+        if LfsLockParser._parse_pending:
+            LfsLockParser._parse_pending = False
+            print("Re-running lock parse which was requested while the last one was in flight.")
+            LfsLockParser.parse_locks_async()
 
     @staticmethod
     def _on_parsing_failed(error):
-        print("LFS lock parser failed: " + error)
+        LfsLockParser._is_parsing = False
+
+        # The failure signal carries an (exc_type, value, traceback) tuple, so it must be
+        # formatted rather than concatenated
+        print(f"LFS lock parser failed: {error}")
+
+        LfsLockParser._run_pending_parse()
 
     @staticmethod
     def _notify_subscribers():
+        LfsLockParser._is_parsing = False
+
         # Only notify if we actually parsed any data successfully
         if LfsLockParser.has_parsed_once:
-            print(f"Notifying {len(LfsLockParser.subscribers)} subscribers.")
-            for subscriber in LfsLockParser.subscribers:
+            # Copy first; garbage collection may shrink the weak set during iteration
+            subscribers = list(LfsLockParser.subscribers)
+            print(f"Notifying {len(subscribers)} subscribers.")
+            for subscriber in subscribers:
                 subscriber.on_lock_data_update()
         else:
             print("Failed to notify %i subscribers because there is no valid data.")
 
+        LfsLockParser._run_pending_parse()
+
     @staticmethod
     def parse_locks_async():
         """
         Asynchronously parses LFS lock data. Once finished, all subscribers will be notified.
+        Requests made while a parse is already in flight are coalesced into a single follow-up
+        parse which runs once the current one completes; the running parse may have read the
+        lock state from before the request and must not be trusted to cover it.
         """
+        if LfsLockParser._is_parsing:
+            print("Deferring lock parse until the one in progress completes.")
+            LfsLockParser._parse_pending = True
+            return
+
+        LfsLockParser._is_parsing = True
+
         worker = WorkerThread(LfsLockParser._parse_locks)
         worker.exec(LfsLockParser._notify_subscribers, LfsLockParser._on_parsing_failed)
 
@@ -116,34 +168,60 @@ class LfsLockParser:
         project_root = utility.get_project_root_directory()
 
         command = [utility.get_git_lfs_path(), 'locks']
-        lines = utility.run_command_and_output_list_of_lines(command, project_root)
 
-        data = []
+        # Already a frozenset, so orphan checks below are O(1) membership tests
+        lfs_tracked_files = utility.get_git_lfs_tracked_files()
 
-        for line in lines:
-            # Split the data string into components
-            components = line.split()
+        matches = []
 
-            # Extract the relevant information
-            file_path = components[0]
-            lock_owner = components[1]
-            lock_id = components[2].split(":")[1]  # Extract the number part after "ID:"
+        # Stream the output so matching overlaps with git-lfs producing it
+        for line in utility.iter_command_lines(command, project_root):
+            # Extract the relevant information in one compiled match instead of split calls
+            match = _LOCK_LINE_PATTERN.match(line)
+            if match is not None:
+                matches.append(match)
+
+        # Index the path components of everything the trees may display, i.e. the locked and
+        # the tracked files. Only paths which actually occur are stat-ed, and the work happens
+        # here on the worker thread, so the populates never touch the disk on the GUI thread.
+        indexed_paths = {match[1] for match in matches}
+        indexed_paths.update(lfs_tracked_files)
+        known_kinds = utility.build_path_kind_index(project_root, indexed_paths)
+
+        data = []
+
+        for match in matches:
+            file_path = match[1]
+            lock_owner = match[2]
+            lock_id = int(match[3])
 
             # Does the file exists locally?
-            is_local_file = os.path.isfile(project_root + file_path)
+            is_local_file = known_kinds.get(file_path) == 'f'
 
             # Is the file an orphaned file, meaning it does not exist anywhere on the remote?
-            is_orphaned = utility.is_file_orphaned(file_path) and is_local_file
+            is_orphaned = is_local_file and file_path not in lfs_tracked_files
             # if is_orphaned:
             #     print("File '%s' is orphaned." % file_path)
 
             data.append(LfsLockData(lock_id, lock_owner, file_path, is_orphaned, is_local_file))
 
+        # Dataclass equality makes this an element-wise comparison; most refreshes change
+        # nothing and subscribers can then skip their rebuild entirely
+        if data != LfsLockParser.lock_data or not LfsLockParser.has_parsed_once:
+            LfsLockParser.data_revision += 1
+
         # Keep a copy of the parsed data
         LfsLockParser.lock_data = data
 
-        # Cache unique lock owners
-        LfsLockParser.lock_owners = LfsLockParser.get_lock_owners(data)
+        # Publish the path-kind index for the tree populates of this update
+        LfsLockParser.path_kind_index = known_kinds
+
+        # Index the data by relative path so per-file lookups do not rescan the whole list
+        LfsLockParser._lock_data_by_path = {lock.relative_path: lock for lock in data}
+
+        # Cache unique lock owners, sorted once here so consumers like the owner combo box
+        # get a stable order for free
+        LfsLockParser.lock_owners = sorted(LfsLockParser.get_lock_owners(data))
 
         LfsLockParser.has_parsed_once = True
 
@@ -2,10 +2,12 @@
 This module implements the widgets responsible for displaying the locking and unlocking
 application modes.
 """
+import logging
+import os
 from abc import abstractmethod
+from typing import override
 
-import pyperclip
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QApplication, QLineEdit, QComboBox, \
     QHBoxLayout, \
     QSizePolicy
@@ -17,12 +19,88 @@ from lfs_lock_parser import LfsLockParser
 from settings import Settings
 from worker_thread import WorkerThread
 
+# Lazily formatted so disabled levels skip the string work entirely
+log = logging.getLogger(__name__)
+
+
+def _get_command_length_limit():
+    """
+    This helper function determines the argument byte budget for a single command. The resolved
+    limit is cached since the platform cannot change at runtime.
+    :return: Returns the maximum number of argument bytes to pass to one command
+    """
+    if not hasattr(_get_command_length_limit, "limit"):
+        if utility.get_platform() == utility.Platform.LINUX:
+            # Leave headroom below ARG_MAX for the environment block
+            _get_command_length_limit.limit = os.sysconf("SC_ARG_MAX") - 4096
+        else:
+            # CreateProcess caps the command line at 32768 characters
+            _get_command_length_limit.limit = 32000
+
+    return _get_command_length_limit.limit
+
+
+def _iter_file_batches(file_list: [str]):
+    """
+    This helper function yields batches of the given file list, each sized so that the resulting
+    command line stays below the platform's argument length limit. Sizing batches by bytes
+    instead of a fixed file count keeps the number of git-lfs invocations as small as the OS
+    allows.
+    :param file_list: The file list to split into batches
+    """
+    limit = _get_command_length_limit()
+
+    batch = []
+    byte_count = 0
+
+    for file in file_list:
+        # One extra byte per argument separator
+        file_length = len(file) + 1
+
+        if len(batch) > 0 and byte_count + file_length >= limit:
+            yield batch
+            batch = []
+            byte_count = 0
+
+        batch.append(file)
+        byte_count += file_length
+
+    if len(batch) > 0:
+        yield batch
+
+
+def _run_commands(commands: [list], cwd: str):
+    """
+    This helper function executes the given commands one after another. Concurrent git-lfs
+    children would race each other on the shared lock cache under .git/lfs, so the batches run
+    sequentially; the byte-budget batching above already keeps the number of invocations as
+    small as the OS allows.
+    :param commands: The commands to execute, each as a list of strings
+    :param cwd: The desired working directory
+    """
+    for command in commands:
+        # The per-file status lines of git-lfs lock/unlock are never inspected; failures are
+        # still reported since stderr remains captured
+        utility.run_command(command, cwd, discard_output=True)
+
 
 class LockingWidgetBase(QWidget):
+    # pylint: disable=too-many-instance-attributes
     """
     This class implements shared functionality of the locking and unlocking widgets.
     """
 
+    # Styling the parent once is cheaper than attaching a stylesheet to every button and
+    # combo box individually
+    SUB_LAYOUT_STYLE_SHEET = "QPushButton, QComboBox { font-size: 14px; }"
+
+    # Operations on fewer files finish quickly enough that a notification is just noise
+    NOTIFICATION_MIN_FILES = 4
+
+    # True while a locking or unlocking worker is in flight. Shared across both mode widgets
+    # so concurrent git-lfs children cannot race each other on the lock cache.
+    _operation_in_flight = False
+
     def __init__(self):
         super().__init__()
 
@@ -32,7 +110,27 @@ class LockingWidgetBase(QWidget):
 
         self.sub_layout_width = 150
         self.sub_layout_height = 30
-        self.sub_layout_text_size = 'font-size: 14px'
+
+        # One reusable notification dialog instead of constructing a widget per operation
+        self._notification_dialog = None
+
+        # Set when lock data arrives while this widget is hidden, so the repopulation can be
+        # caught up on the next show instead of burning time on an invisible tree
+        self._needs_repopulation = False
+
+        # The parser data revision this widget last rebuilt its tree for
+        self._seen_data_revision = -1
+
+        # Debounce keystrokes so a burst of typing results in a single filter pass
+        self._filter_debounce_timer = QTimer(self)
+        self._filter_debounce_timer.setSingleShot(True)
+        self._filter_debounce_timer.setInterval(200)
+        self._filter_debounce_timer.timeout.connect(
+            lambda: self._on_tree_filter_text_changed(self._pending_filter_text))
+
+        self._pending_filter_text = ""
+
+        self.setStyleSheet(self.SUB_LAYOUT_STYLE_SHEET)
 
         # Subscribe to lock data updates
         LfsLockParser.subscribe_to_update(self)
@@ -42,25 +140,68 @@ class LockingWidgetBase(QWidget):
         This function initiates a locking operation given a file list.
         :param file_list: The file list to operate on
         """
-        dialog = pyqt_helpers.NotificationDialog(f"Locking {len(file_list)} files", 400, 40)
-        dialog.run(self.parent())
+        if not self._try_begin_operation():
+            # The caller disabled the widget in anticipation of a worker; no worker will run,
+            # so restore it here
+            self.setEnabled(True)
+            return
+
+        self._show_operation_notification(f"Locking {len(file_list)} files", len(file_list))
 
         worker = WorkerThread(self._exec_locking_operation_on_file_list, file_list, True)
-        worker.exec(self._on_finished_locking_operation)
+        worker.exec(self._on_finished_locking_operation, self._on_locking_operation_failed)
 
     def exec_unlocking_operation_on_file_list(self, file_list: [str]):
         """
         This function initiates an unlocking operation given a file list.
         :param file_list: The file list to operate on
         """
-        dialog = pyqt_helpers.NotificationDialog(f"Unlocking {len(file_list)} files", 400, 40)
-        dialog.run(self.parent())
+        if not self._try_begin_operation():
+            # The caller disabled the widget in anticipation of a worker; no worker will run,
+            # so restore it here
+            self.setEnabled(True)
+            return
+
+        self._show_operation_notification(f"Unlocking {len(file_list)} files", len(file_list))
 
         worker = WorkerThread(self._exec_locking_operation_on_file_list, file_list, False)
-        worker.exec(self._on_finished_locking_operation)
+        worker.exec(self._on_finished_locking_operation, self._on_locking_operation_failed)
+
+    def _show_operation_notification(self, message: str, num_files: int):
+        if num_files < self.NOTIFICATION_MIN_FILES:
+            return
+
+        if self._notification_dialog is None:
+            self._notification_dialog = pyqt_helpers.NotificationDialog(message, 400, 40)
+        else:
+            self._notification_dialog.set_message(message)
+
+        self._notification_dialog.run(self.parent())
+
+    @staticmethod
+    def _try_begin_operation():
+        """
+        This helper function claims the shared operation slot. At most one locking or unlocking
+        worker may run at a time; further requests are dropped until it finishes.
+        :return: Returns true, if the operation may proceed
+        """
+        if LockingWidgetBase._operation_in_flight:
+            log.info("Ignoring locking request because an operation is already running.")
+            return False
+
+        LockingWidgetBase._operation_in_flight = True
+        return True
+
+    def _on_locking_operation_failed(self, error):
+        LockingWidgetBase._operation_in_flight = False
+        log.error("LFS locking operation failed: %s", error)
+
+        # Re-enable the widget so the user can retry
+        self.setEnabled(True)
 
     def _on_finished_locking_operation(self, result: bool):
-        print("Finished LFS locking operation.")
+        LockingWidgetBase._operation_in_flight = False
+        log.info("Finished LFS locking operation.")
 
         if result is True:
             # Only parse locks if a locking operation was performed
@@ -68,7 +209,6 @@ class LockingWidgetBase(QWidget):
         else:
             # Re-enable the widget
             self.setEnabled(True)
-            QApplication.processEvents()
 
     @staticmethod
     def _exec_locking_operation_on_file_list(file_list: [], should_lock: bool):
@@ -78,45 +218,49 @@ class LockingWidgetBase(QWidget):
         :param should_lock: If true, the locking operation will be lfs lock. Otherwise, lfs unlock.
         :return: Return true if a locking operation was performed (either lock or unlock)
         """
-        git_command = utility.get_git_lfs_path()
-
-        if should_lock:
-            git_command += " lock "
-        else:
-            git_command += " unlock "
+        # Build the argv directly; splitting a joined string would break if the executable
+        # path contains spaces
+        argv_prefix = [utility.get_git_lfs_path(), "lock" if should_lock else "unlock"]
 
         project_root = utility.get_project_root_directory()
 
-        if not should_lock:
-            non_owned_files = []
-            owned_files = []
-
-            if utility.is_git_user_admin():
-                for file in file_list:
-                    # We only need to force unlock non-owning file locks
-                    file_owner = LfsLockParser.get_lock_owner_of_file(file)
-                    if file_owner != utility.get_git_user():
-                        print(
-                            f"Appending file '{file}' to non-owning files (owner '{file_owner}').")
-                        non_owned_files.append(file)
-                    else:
-                        print(f"Appending file '{file}' to owning files.")
-                        owned_files.append(file)
-
-                git_admin_command = git_command + "--force "
-                admin_command = git_admin_command.split() + file_list
-                print(f"Executing admin command ({len(admin_command)}): {admin_command}")
-                utility.run_command(admin_command, project_root)
-
-                # Filter all non-owning files from the file list
-                if len(non_owned_files) > 0:
-                    file_list.clear()
-                    file_list = owned_files
+        # Work on a local so the caller's list is never mutated
+        remaining_files = file_list
+
+        if not should_lock and utility.is_git_user_admin():
+            # The user cannot change mid-operation, so resolve it once
+            git_user = utility.get_git_user()
+
+            # Snapshot the owners once instead of querying the parser per file
+            owner_by_path = {lock.relative_path: lock.lock_owner
+                             for lock in LfsLockParser.lock_data}
+
+            # We only need to force unlock non-owning file locks. map and zip keep the
+            # partition in C instead of a Python-level loop body.
+            owners = list(map(owner_by_path.get, file_list))
+            non_owned_files = [file for file, owner in zip(file_list, owners)
+                               if owner != git_user]
+            owned_files = [file for file, owner in zip(file_list, owners)
+                           if owner == git_user]
+
+            log.debug("Partitioned %d files into %d owned and %d non-owned.",
+                      len(file_list), len(owned_files), len(non_owned_files))
+
+            # Only the non-owning locks need the force flag
+            if len(non_owned_files) > 0:
+                admin_argv_prefix = argv_prefix + ["--force"]
+                admin_commands = [admin_argv_prefix + file_batch
+                                  for file_batch in _iter_file_batches(non_owned_files)]
+                log.debug("Executing %d admin command batches.", len(admin_commands))
+                _run_commands(admin_commands, project_root)
+
+                remaining_files = owned_files
 
         # Proceed with the remaining locks
-        command = git_command.split() + file_list
-        print(f"Executing command ({len(command)}): {command}")
-        utility.run_command(command, project_root)
+        commands = [argv_prefix + file_batch
+                    for file_batch in _iter_file_batches(remaining_files)]
+        log.debug("Executing %d command batches.", len(commands))
+        _run_commands(commands, project_root)
 
         return True
 
@@ -127,19 +271,65 @@ class LockingWidgetBase(QWidget):
         object subscribed to the parser beforehand.
         """
 
-    def _on_tree_selection_changed(self):
-        pass
+    def _defer_update_if_hidden(self):
+        """
+        This helper function marks a hidden widget for deferred repopulation. The application
+        only ever shows one mode at a time, so the inactive one skips its tree rebuild until
+        the user actually switches to it.
+        :return: Returns true, if the update was deferred
+        """
+        if not self.isVisible():
+            self._needs_repopulation = True
+            return True
+
+        return False
+
+    def _consume_lock_data_revision(self):
+        """
+        This helper function checks whether the parser delivered data this widget has not yet
+        displayed. Refreshes frequently re-parse an unchanged lock list, in which case the whole
+        tree rebuild can be skipped.
+        :return: Returns true, if the data changed since the last rebuild
+        """
+        if LfsLockParser.data_revision == self._seen_data_revision:
+            return False
+
+        self._seen_data_revision = LfsLockParser.data_revision
+        return True
+
+    @override
+    def showEvent(self, event):
+        # pylint: disable=invalid-name
+        """
+        This function catches up on lock data updates which arrived while the widget was hidden.
+        :param event: The Qt event
+        """
+        super().showEvent(event)
+
+        if self._needs_repopulation:
+            self._needs_repopulation = False
+            self.on_lock_data_update()
 
     def _create_tree_filter_widget(self):
         tree_filter_widget = QLineEdit()
-        tree_filter_widget.textChanged.connect(self._on_tree_filter_text_changed)
+        tree_filter_widget.textChanged.connect(self._schedule_tree_filter)
         tree_filter_widget.setPlaceholderText("Search for files and folders ...")
 
         return tree_filter_widget
 
-    @abstractmethod
+    def _schedule_tree_filter(self, text: str):
+        self._pending_filter_text = text
+
+        # Clearing the box should restore the tree instantly instead of waiting out the timer
+        if text == "":
+            self._filter_debounce_timer.stop()
+            self._on_tree_filter_text_changed(text)
+        else:
+            self._filter_debounce_timer.start()
+
     def _on_tree_filter_text_changed(self, text: str):
-        self.file_tree_widget.hide_empty_folders()
+        # Filter the resident tree in place; rebuilding all items per keystroke is too costly
+        self.file_tree_widget.apply_filter(text)
 
         should_expand = text != ""
         root_item = self.file_tree_widget.invisibleRootItem()
@@ -153,21 +343,28 @@ class LockingWidgetBase(QWidget):
         apply_selection_from_clipboard_button_widget.clicked.connect(
             self._on_apply_selection_from_clipboard_pressed)
         apply_selection_from_clipboard_button_widget.setFixedSize(250, self.sub_layout_height)
-        apply_selection_from_clipboard_button_widget.setStyleSheet(self.sub_layout_text_size)
 
         return apply_selection_from_clipboard_button_widget
 
     def _on_apply_selection_from_clipboard_pressed(self):
         # @TODO: It does not work in locking mode
-        clipboard_string = pyperclip.paste()
-        items = clipboard_string.split()
-        self.file_tree_widget.set_selected_items(items)
-
-        # @TODO: The number of selected files should be returned from the set_selected_items
-        #  function since we might
-        #  have unwanted substrings in our clipboard.
-        dialog = pyqt_helpers.NotificationDialog(f"Selected {len(items)} items from clipboard",
-                                                 500, 40)
+        # Qt reads the clipboard in-process; pyperclip would spawn a helper subprocess on some
+        # platforms
+        clipboard_string = QApplication.clipboard().text()
+
+        # Keep only tokens which can plausibly match a tree item, i.e. paths and lock ids.
+        # Clipboards often carry surrounding prose, and every stray token would otherwise be
+        # compared against the whole tree. The set also drops duplicates. Separator-free
+        # tokens are checked against the known tracked and locked paths so repo-root files
+        # (which have no slash) survive a copy/paste round-trip.
+        items = {token for token in clipboard_string.split()
+                 if '/' in token or '\\' in token or '.' in token or token.isdigit() or
+                 token in utility.get_git_lfs_tracked_files() or
+                 LfsLockParser.get_lock_data_of_file(token) is not None}
+        num_selected = self.file_tree_widget.set_selected_items(items)
+
+        dialog = pyqt_helpers.NotificationDialog(
+            f"Selected {num_selected} items from clipboard", 500, 40)
         dialog.run(self.parent())
 
 
@@ -205,19 +402,19 @@ class LockingWidget(LockingWidgetBase):
 
         self.setLayout(base_layout)
 
-    def _on_tree_filter_text_changed(self, text: str):
-        self.file_tree_widget.populate(LfsLockParser.lock_data, Settings.default_expansion_depth,
-                                       text)
+    def on_lock_data_update(self):
+        if self._defer_update_if_hidden():
+            return
 
-        super()._on_tree_filter_text_changed(text)
+        if not self._consume_lock_data_revision():
+            log.debug("Locking widget: Lock data is unchanged. Keeping current tree.")
+            return
 
-    def on_lock_data_update(self):
-        print("Locking widget: Lock data was updated. Re-populating tree ...")
+        log.info("Locking widget: Lock data was updated. Re-populating tree ...")
         self.file_tree_widget.populate(LfsLockParser.lock_data, Settings.default_expansion_depth)
 
     def _create_file_tree_widget(self):
         tree_widget = LockingFileTreeWidget()
-        tree_widget.itemSelectionChanged.connect(self._on_tree_selection_changed)
         # tree_widget.populate(LfsLockParser.lock_data, Settings.default_expansion_depth)
 
         return tree_widget
@@ -226,17 +423,14 @@ class LockingWidget(LockingWidgetBase):
         lock_button_widget = QPushButton('Lock', self)
         lock_button_widget.clicked.connect(self._on_locked_pressed)
         lock_button_widget.setFixedSize(self.sub_layout_width, self.sub_layout_height)
-        lock_button_widget.setStyleSheet(self.sub_layout_text_size)
 
         return lock_button_widget
 
     def _on_locked_pressed(self):
         self.setEnabled(False)
-        QApplication.processEvents()
 
-        # Extract lock Ids
-        selected_files = self.file_tree_widget.get_selected_file_paths()
-        file_list = [str(data) for data in selected_files]
+        # get_selected_file_paths already returns plain strings
+        file_list = self.file_tree_widget.get_selected_file_paths()
 
         self.exec_locking_operation_on_file_list(file_list)
 
@@ -277,49 +471,76 @@ class UnlockingWidget(LockingWidgetBase):
 
         self.setLayout(base_layout)
 
-    def _on_tree_filter_text_changed(self, text: str):
-        self.file_tree_widget.populate(LfsLockParser.lock_data, self.selected_git_user,
-                                       Settings.default_expansion_depth, text)
+    def on_lock_data_update(self):
+        if self._defer_update_if_hidden():
+            return
 
-        super()._on_tree_filter_text_changed(text)
+        if not self._consume_lock_data_revision():
+            log.debug("Unlock widget: Lock data is unchanged. Keeping current tree.")
+            return
 
-    def on_lock_data_update(self):
-        print("Unlock widget: Lock data was updated. Re-populating tree ...")
-        self.file_tree_widget.populate(LfsLockParser.lock_data, self.selected_git_user,
-                                       Settings.default_expansion_depth)
+        log.info("Unlock widget: Lock data was updated. Re-populating tree ...")
 
+        # Sync the owner selection first so the tree is populated for the surviving selection
         self._populate_lock_owner_selection_widget(self.lock_owner_selection_widget)
 
+        # Populate with every lock once; the owner selection is applied as a visibility filter
+        # so flipping owners does not rebuild the tree
+        self.file_tree_widget.populate(LfsLockParser.lock_data, "All",
+                                       Settings.default_expansion_depth)
+        self.file_tree_widget.filter_by_owner(self.selected_git_user)
+
     def _create_lock_owner_selection_widget(self):
         lock_owner_selection_widget = QComboBox()
         lock_owner_selection_widget.setFixedSize(self.sub_layout_width, self.sub_layout_height)
-        lock_owner_selection_widget.setStyleSheet(self.sub_layout_text_size)
 
         self._populate_lock_owner_selection_widget(lock_owner_selection_widget)
 
+        # Connect exactly once; reconnecting on every repopulation used to stack duplicate
+        # handlers which each re-populated the tree
+        lock_owner_selection_widget.currentTextChanged.connect(
+            self._on_lock_owner_selection_changed)
+
         return lock_owner_selection_widget
 
     def _populate_lock_owner_selection_widget(self, lock_owner_selection_widget):
-        lock_owner_selection_widget.clear()
-        lock_owner_selection_widget.addItem("All")
-        lock_owner_selection_widget.setFixedSize(self.sub_layout_width, self.sub_layout_height)
+        owners = LfsLockParser.lock_owners
 
-        self_index = 0
+        # Repopulate silently; clearing and re-adding entries would otherwise fire a signal
+        # per intermediate selection change
+        lock_owner_selection_widget.blockSignals(True)
 
-        for index, owner in enumerate(LfsLockParser.lock_owners):
-            # We want to select the current user by default
-            if owner == self.git_user:
-                self_index = index
+        lock_owner_selection_widget.clear()
+        lock_owner_selection_widget.addItems(["All", *owners])
+
+        # Keep the previous selection alive if that owner still holds locks, otherwise fall
+        # back to the current user by default
+        preferred_owner = self.selected_git_user
+        if preferred_owner != "All" and preferred_owner not in owners:
+            preferred_owner = self.git_user
+
+        if preferred_owner == "All" or len(owners) == 0:
+            current_index = 0
+        elif preferred_owner in owners:
+            current_index = owners.index(preferred_owner) + 1
+        else:
+            current_index = 1
 
-            lock_owner_selection_widget.addItem(owner)
+        lock_owner_selection_widget.setCurrentIndex(current_index)
+        lock_owner_selection_widget.blockSignals(False)
 
-        lock_owner_selection_widget.setCurrentIndex(self_index + 1)
-        lock_owner_selection_widget.currentTextChanged.connect(
-            self._on_lock_owner_selection_changed)
+        # Before the first parse the combo box only contains 'All'; adopting that here would
+        # clobber the current-user default the widget starts with
+        if len(owners) > 0:
+            self.selected_git_user = lock_owner_selection_widget.currentText()
+
+        # The selection handler is suppressed while signals are blocked, so the unlock-button
+        # enablement it normally maintains has to be recomputed here
+        self.unlock_button_widget.setEnabled(
+            utility.is_git_user_admin() or self.selected_git_user == self.git_user)
 
     def _create_file_tree_widget(self):
         file_tree_widget = UnlockingFileTreeWidget()
-        file_tree_widget.itemSelectionChanged.connect(self._on_tree_selection_changed)
         # file_tree_widget.populate(LfsLockParser.lock_data, self.selected_git_user,
         #                           Settings.default_expansion_depth)
 
@@ -330,29 +551,23 @@ class UnlockingWidget(LockingWidgetBase):
         unlock_button_widget.clicked.connect(self._on_unlocked_pressed)
         # unlock_button_widget.setGeometry(50, 50, 100, 30)  # Set button position and size
         unlock_button_widget.setFixedSize(self.sub_layout_width, self.sub_layout_height)
-        unlock_button_widget.setStyleSheet(self.sub_layout_text_size)
 
         return unlock_button_widget
 
     def _on_lock_owner_selection_changed(self, text: str):
         self.selected_git_user = text
-        self.file_tree_widget.populate(LfsLockParser.lock_data, self.selected_git_user,
-                                       Settings.default_expansion_depth)
+
+        # Items already exist for every lock, so switching owners only toggles visibility
+        self.file_tree_widget.filter_by_owner(self.selected_git_user)
 
         is_admin = utility.is_git_user_admin()
-        if is_admin or self.selected_git_user == self.git_user:
-            self.unlock_button_widget.setEnabled(True)
-            QApplication.processEvents()
-        else:
-            self.unlock_button_widget.setEnabled(False)
-            QApplication.processEvents()
+        self.unlock_button_widget.setEnabled(
+            is_admin or self.selected_git_user == self.git_user)
 
     def _on_unlocked_pressed(self):
         self.setEnabled(False)
-        QApplication.processEvents()
 
-        # Extract lock Ids
-        selected_files = self.file_tree_widget.get_selected_file_paths()
-        file_list = [str(data) for data in selected_files]
+        # get_selected_file_paths already returns plain strings
+        file_list = self.file_tree_widget.get_selected_file_paths()
 
         self.exec_unlocking_operation_on_file_list(file_list)
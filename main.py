@@ -9,7 +9,7 @@ from enum import Enum
 
 import darkdetect
 import qdarktheme
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 from PyQt5.QtGui import QPalette, QColor, QFontDatabase, QFont
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, \
@@ -24,13 +24,45 @@ from locking_widgets import UnlockingWidget, LockingWidget
 from settings import Settings
 
 
+def _get_theme_assets(theme: str):
+    """
+    This function loads and caches the stylesheet and palette of the given theme, so the QSS is
+    only parsed once per theme instead of on every toggle.
+    :param theme: Either 'dark' or 'light'
+    :return: Returns a (stylesheet, palette) tuple
+    """
+    if not hasattr(_get_theme_assets, "cache"):
+        _get_theme_assets.cache = {}
+
+    assets = _get_theme_assets.cache.get(theme)
+    if assets is None:
+        stylesheet = qdarktheme.load_stylesheet(theme)
+        palette = qdarktheme.load_palette(theme)
+
+        if theme == "dark":
+            # Fix for hyperlinks in dark theme
+            palette.setColor(QPalette.Link, QColor(29, 212, 250))
+
+        assets = (stylesheet, palette)
+        _get_theme_assets.cache[theme] = assets
+
+    return assets
+
+
 class ApplicationMode(Enum):
     """ All modes which the application supports """
     UNLOCK = 0
     LOCK = 1
 
     def __str__(self):
-        return self.name.lower().capitalize() + " Mode"
+        return _APPLICATION_MODE_LABELS[self]
+
+
+# Precomputed display labels; there are only two fixed modes
+_APPLICATION_MODE_LABELS = {
+    ApplicationMode.UNLOCK: "Unlock Mode",
+    ApplicationMode.LOCK: "Lock Mode",
+}
 
 
 class LfsLockManagerWindow(QMainWindow):
@@ -51,6 +83,7 @@ class LfsLockManagerWindow(QMainWindow):
         self.setWindowIcon(icon)
 
         # Set initial theme
+        self._active_theme = None
         self.is_dark_theme = darkdetect.isDark()
         if self.is_dark_theme:
             self._set_dark_theme()
@@ -215,25 +248,24 @@ class LfsLockManagerWindow(QMainWindow):
         else:
             self._set_dark_theme()
 
-    def _set_light_theme(self):
-        new_stylesheet = qdarktheme.load_stylesheet("light")
-        new_palette = qdarktheme.load_palette("light")
+    def _apply_theme(self, theme: str):
+        # Re-applying the active theme would repolish every widget for no visual change
+        if self._active_theme == theme:
+            return
+
+        new_stylesheet, new_palette = _get_theme_assets(theme)
 
         self.setStyleSheet(new_stylesheet)
         self.setPalette(new_palette)
 
-        self.is_dark_theme = False
+        self._active_theme = theme
+        self.is_dark_theme = theme == "dark"
 
-    def _set_dark_theme(self):
-        new_stylesheet = qdarktheme.load_stylesheet("dark")
-        new_palette = qdarktheme.load_palette("dark")
-        new_palette.setColor(QPalette.Link,
-                             QColor(29, 212, 250))  # Fix for hyperlinks in dark theme
-
-        self.setStyleSheet(new_stylesheet)
-        self.setPalette(new_palette)
+    def _set_light_theme(self):
+        self._apply_theme("light")
 
-        self.is_dark_theme = True
+    def _set_dark_theme(self):
+        self._apply_theme("dark")
 
     def _show_tutorial_dialog(self):
         pyqt_helpers.display_message_window(self, "A tutorial will be added later.", 300, 20)
@@ -271,7 +303,6 @@ class LfsLockManagerWindow(QMainWindow):
         self.tool_bar_widget.setEnabled(True)
         self.locking_widget.setEnabled(True)
         self.unlocking_widget.setEnabled(True)
-        QApplication.processEvents()
 
         # Make sure this only applies on application start
         if not self.has_lock_data:
@@ -309,5 +340,10 @@ if __name__ == "__main__":
     # Show the main window
     window.show()
 
+    # Warm the cache for the inactive theme once the window is up, so the first theme toggle
+    # does not stall on parsing that theme's stylesheet
+    inactive_theme = "light" if window.is_dark_theme else "dark"
+    QTimer.singleShot(500, lambda: _get_theme_assets(inactive_theme))
+
     # Run the event loop
     sys.exit(lockManager.exec_())
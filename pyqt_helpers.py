@@ -66,9 +66,12 @@ class OverlayWidget(QWidget):
 class NotificationDialog(QDialog):
     """
     A helper class for easily displaying notifications which automatically disappear after a few
-    seconds.
+    seconds. Instances can be reused by updating the message and calling run() again.
     """
 
+    # How long a notification stays visible, in milliseconds
+    DISPLAY_TIME_MS = 3000
+
     def __init__(self, message: str, width: int, height: int):
         super().__init__()
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
@@ -82,10 +85,16 @@ class NotificationDialog(QDialog):
         self.label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.label)
 
-        self.timer = QTimer()
+        self.timer = QTimer(self)
         self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.close)
-        self.timer.start(3000)  # Close after 3000 milliseconds (3 seconds)
+
+    def set_message(self, message: str):
+        """
+        This function updates the displayed message, allowing the dialog to be reused.
+        :param message: The desired notification message
+        """
+        self.label.setText(message)
 
     def showEvent(self, event):
         # pylint: disable=invalid-name
@@ -106,8 +115,13 @@ class NotificationDialog(QDialog):
 
     def run(self, parent: QWidget):
         """
-        This function is used to display the window.
+        This function is used to display the window. It returns immediately rather than spinning
+        a nested event loop; the dialog hides itself once the display timer expires.
         :param parent: The parent widget this window will be relative to.
         """
-        self.setParent(parent)
-        self.exec_()
+        if self.parent() is not parent:
+            # Preserve the window flags; a plain setParent would demote this to a child widget
+            self.setParent(parent, self.windowFlags())
+
+        self.show()
+        self.timer.start(self.DISPLAY_TIME_MS)
@@ -1,26 +1,34 @@
 """ This module defines generic user settings. """
 import configparser
-import dataclasses
+
+__all__ = ["Settings", "load_settings"]
 
 
-@dataclasses.dataclass
 class Settings:
+    # pylint: disable=too-few-public-methods
     """
-    This class stores user settings which are parsed from the `settings.ini` file.
+    This class stores user settings which are parsed from the `settings.ini` file. The class is
+    never instantiated; all settings live as class-level attributes.
     """
     # Define class-level properties
-    project_root_directory = "../"
-    default_expansion_depth = 3
-    git_admin_users = []
-    custom_git_lfs_path = ""
-    default_mode = "Unlock"
-    lock_mode_file_filter = ""
+    project_root_directory: str = "../"
+    default_expansion_depth: int = 3
+    git_admin_users: frozenset = frozenset()
+    custom_git_lfs_path: str = ""
+    default_mode: str = "Unlock"
+    lock_mode_file_filter: str = ""
 
 
 def load_settings():
     """
-    This function parses the settings.ini config file.
+    This function parses the settings.ini config file. Calling it more than once is a no-op,
+    since the settings cannot change while the application is running.
     """
+    if getattr(load_settings, "has_loaded", False):
+        return
+
+    load_settings.has_loaded = True
+
     # The file which we will be parsing
     file_path = "settings.ini"
 
@@ -35,7 +43,8 @@ def load_settings():
     Settings.project_root_directory = config.get('Settings', 'projectRootDirectory')
     Settings.default_expansion_depth = config.getint('Settings', 'defaultExpansionDepth')
     users_str = config.get('Settings', 'gitAdminUsers')
-    Settings.git_admin_users = [user.strip() for user in users_str.split(',')]
+    # A frozenset makes the admin checks O(1) membership tests
+    Settings.git_admin_users = frozenset(user.strip() for user in users_str.split(','))
     Settings.custom_git_lfs_path = config.get('Settings', 'customGitLfsExecutable')
     Settings.default_mode = config.get('Settings', 'defaultMode')
     Settings.lock_mode_file_filter = config.get('Settings', 'lockModeFileFilter')
@@ -1,6 +1,9 @@
 """ This module implements application-related helper functions. """
+import configparser
+import functools
 import os
 import shutil
+import stat
 import subprocess
 import sys
 from enum import Enum
@@ -28,12 +31,30 @@ class GitLfsExecutableError(Exception):
         super().__init__(self.message)
 
 
-def run_command(command: list, cwd: str, print_output=False):
+@functools.cache
+def _get_subprocess_env():
+    """
+    This function builds the environment passed to every git subprocess. The copy of os.environ
+    is taken once and reused, since the environment never changes while the application runs.
+    :return: Returns the environment dict for subprocesses
+    """
+    env = os.environ.copy()
+
+    # Never let git block on an interactive credential prompt nobody can answer
+    env['GIT_TERMINAL_PROMPT'] = '0'
+
+    return env
+
+
+def run_command(command: list, cwd: str, print_output=False, discard_output=False):
     """
     This function executes the given command.
     :param command: The command as a list of strings
     :param cwd: The desired working directory
     :param print_output: Optionally prints the command's output if successful for debugging purposes
+    :param discard_output: If true, stdout goes to the null device. Use this for commands whose
+    output is ignored; it skips the user-space copy and removes the risk of the child stalling
+    on a full pipe buffer which nobody drains in time.
     :return: Returns the command's output if successful, otherwise an empty string
     """
     # If not root directory was specified, we will default to the Git project's root
@@ -43,29 +64,30 @@ def run_command(command: list, cwd: str, print_output=False):
     try:
         print("Command to run: " + str(command) + " in cwd: " + cwd)
 
-        env = os.environ.copy()
-        env['GIT_TERMINAL_PROMPT'] = '0'
-        env['GIT_TRACE'] = '1'
-        env['GIT_CURL_VERBOSE'] = '1'
+        env = _get_subprocess_env()
 
-        with subprocess.Popen(command, env=env, cwd=cwd, stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE) as process:
-            # Wait for the process to finish and capture the output
-            stdout, stderr = process.communicate()
+        stdout_target = subprocess.DEVNULL if discard_output else subprocess.PIPE
 
-            # Check the return code to detect errors
-            return_code = process.returncode
+        # subprocess.run() handles the wait/communicate dance for us and decodes the output
+        # exactly once inside the stdlib. The encoding must be explicit: git talks UTF-8, but
+        # the locale default on Windows is a codepage which would mangle non-ASCII paths.
+        process = subprocess.run(command, env=env, cwd=cwd, stdout=stdout_target,
+                                 stderr=subprocess.PIPE, encoding='utf-8', errors='replace',
+                                 check=False)
 
-            # Command executed successfully
-            if return_code == 0:
-                if print_output:
-                    print("Command output:\n{%s}" % stdout.decode())
+        # Command executed successfully
+        if process.returncode == 0:
+            if discard_output:
+                return ""
 
-                return stdout.decode('utf-8')
+            if print_output:
+                print("Command output:\n{%s}" % process.stdout)
 
-            # Command execution failed
-            print("Command execution failed with return code:", return_code)
-            print("Error output:\n{%s}" % stderr.decode())
+            return process.stdout
+
+        # Command execution failed
+        print("Command execution failed with return code:", process.returncode)
+        print("Error output:\n{%s}" % process.stderr)
 
     # Handle any exceptions that occurred during command execution
     # pylint: disable=broad-exception-caught
@@ -75,50 +97,94 @@ def run_command(command: list, cwd: str, print_output=False):
     return ""
 
 
-def run_command_and_output_list_of_lines(command: list, cwd: str):
+def iter_command_lines(command: list, cwd: str):
     """
-    This function executes a command using `run_command` internally, but stores each line of the
-    command's output in a list.
-    :param command: The command to execute
+    This function executes the given command and yields each non-empty line of its output as it
+    is produced, so callers can parse while the command is still running instead of buffering
+    the complete output first.
+    :param command: The command as a list of strings
     :param cwd: The desired working directory
-    :return: The lines of the output in a list
     """
-    output = run_command(command, cwd)
+    # If not root directory was specified, we will default to the Git project's root
+    if cwd == "":
+        cwd = get_project_root_directory()
+
+    try:
+        print("Command to run: " + str(command) + " in cwd: " + cwd)
 
-    # Split the output into lines and remove empty lines
-    lines = output.splitlines()
-    lines = [line.strip() for line in lines if line.strip()]
+        env = _get_subprocess_env()
 
-    # Return the list of lines
-    return lines
+        # stderr is inherited on purpose: piping it without draining could deadlock once the
+        # pipe buffer fills while we are still reading stdout. The encoding must be explicit:
+        # git talks UTF-8, but the locale default on Windows is a codepage which would mangle
+        # non-ASCII paths.
+        with subprocess.Popen(command, env=env, cwd=cwd, stdout=subprocess.PIPE,
+                              encoding='utf-8', errors='replace') as process:
+            for line in process.stdout:
+                line = line.strip()
+                if line:
+                    yield line
 
+        if process.returncode != 0:
+            print("Command execution failed with return code:", process.returncode)
 
-def is_file_orphaned(relative_file_path: str):
-    """
-    Check if the given file is an orphaned file, i.e. a file which does not exist locally but is
-    an LFS-tracked file.
-    @TODO: The function's name is misleading since it only checks if the given file is actually not
-    tracked by Git LFS.
-    :param relative_file_path: The relative file path to a locked file
-    :return: Returns true, if file is orphaned
-    """
-    git_lfs_tracked_files = get_git_lfs_tracked_files()
-    return relative_file_path not in git_lfs_tracked_files
+    # Handle any exceptions that occurred during command execution
+    # pylint: disable=broad-exception-caught
+    except Exception as e:
+        print("An error occurred:\n{%s}" % str(e))
 
 
+@functools.cache
 def get_git_lfs_tracked_files():
     """
-    Retrieves all files tracked by Git LFS
+    Retrieves all files tracked by Git LFS. The result is a frozenset so the orphan checks in
+    the lock parser are O(1) membership tests instead of scans over the whole list.
     :return: Files tracked by Git LFS
     """
-    if not hasattr(get_git_lfs_tracked_files, "tracked_files"):
-        print("Cached LFS tracked files.")
-        project_root = get_project_root_directory()
-        get_git_lfs_tracked_files.tracked_files = (
-            run_command_and_output_list_of_lines(
-                [get_git_lfs_path(), 'ls-files', '--name-only'], project_root))
+    print("Caching LFS tracked files.")
+    project_root = get_project_root_directory()
+    return frozenset(
+        iter_command_lines([get_git_lfs_path(), 'ls-files', '--name-only'], project_root))
+
+
+def build_path_kind_index(root_directory: str, relative_paths):
+    """
+    This function records for every path component of the given relative paths whether it is a
+    directory or a file. Only components which actually occur are stat-ed, so the cost scales
+    with the lock and tracked-file lists rather than with the working tree, which may contain
+    huge directories the application never displays.
+    :param root_directory: The directory the relative paths are anchored at
+    :param relative_paths: The relative paths (using forward slashes) to index
+    :return: Returns a dict mapping relative paths to 'd' or 'f'; paths which do not exist
+    locally are absent
+    """
+    path_kinds = {}
+    seen = set()
+
+    for relative_path in relative_paths:
+        prefix = ""
 
-    return get_git_lfs_tracked_files.tracked_files
+        for part in relative_path.split('/'):
+            prefix = prefix + '/' + part if prefix else part
+
+            if prefix in seen:
+                continue
+
+            seen.add(prefix)
+
+            try:
+                # One stat per component instead of separate isdir and isfile checks
+                mode = os.stat(os.path.join(root_directory, prefix)).st_mode
+            except OSError:
+                # Nothing below a missing component can exist either
+                break
+
+            if stat.S_ISDIR(mode):
+                path_kinds[prefix] = 'd'
+            elif stat.S_ISREG(mode):
+                path_kinds[prefix] = 'f'
+
+    return path_kinds
 
 
 def is_git_installed():
@@ -126,17 +192,9 @@ def is_git_installed():
     This functions checks if Git is installed.
     :return: Returns true, if Git is installed
     """
-    git_executable = shutil.which('git')
-    if git_executable is None:
-        return False
-
-    try:
-        # Run the `git --version` command
-        subprocess.run([git_executable, '--version'], stdout=subprocess.PIPE,
-                       stderr=subprocess.PIPE, check=True)
-        return True
-    except subprocess.CalledProcessError:
-        return False
+    # shutil.which() already verifies an executable file on PATH; running 'git --version' on
+    # top of that only added a subprocess to every startup
+    return shutil.which('git') is not None
 
 
 def is_git_lfs_installed():
@@ -160,29 +218,41 @@ def is_git_config_set():
     """
     try:
         project_root = get_project_root_directory()
-        config_name = run_command(['git', 'config', 'user.name'], project_root)
-        config_mail = run_command(['git', 'config', 'user.email'], project_root)
-        if (config_name == '\n' or len(config_name) == 0) or (
-                config_mail == '\n' or len(config_mail) == 0):
-            return False
+
+        # One subprocess for both keys instead of a 'git config' call each
+        config_entries = run_command(
+            ['git', 'config', '--get-regexp', r'^user\.(name|email)$'], project_root)
+
+        return 'user.name ' in config_entries and 'user.email ' in config_entries
     except subprocess.CalledProcessError:
         return False
 
-    return True
-
 
+@functools.cache
 def get_git_user():
     """
-    This function gets the name of the Git user on this machine.
+    This function gets the name of the Git user on this machine. The repository's .git/config is
+    read directly first, which saves a subprocess; 'git config' is only spawned when the name is
+    not set at the repository level (e.g. it comes from the global config, or the checkout is a
+    worktree whose .git is a file).
     :return: Returns the name of the Git user
     """
-    if not hasattr(get_git_user, "git_user"):
-        project_root = get_project_root_directory()
-        get_git_user.git_user = run_command(['git', 'config', 'user.name'],
-                                            project_root).rstrip(
-            "\n")
+    project_root = get_project_root_directory()
+
+    git_user = ""
+    config_path = os.path.join(project_root, '.git', 'config')
+    try:
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        git_user = config.get('user', 'name', fallback="")
+    # pylint: disable=broad-exception-caught
+    except Exception:
+        pass
+
+    if git_user == "":
+        git_user = run_command(['git', 'config', 'user.name'], project_root).rstrip("\n")
 
-    return get_git_user.git_user
+    return git_user
 
 
 def get_git_branch():
@@ -206,9 +276,11 @@ def is_git_user_admin():
     return False
 
 
+@functools.lru_cache(maxsize=None)
 def resource_path(relative_path: str):
     """
-    Get absolute path to resource, works for dev and for PyInstaller
+    Get absolute path to resource, works for dev and for PyInstaller. Cached per relative path,
+    since the base path cannot change while the application runs.
     """
     base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
     return os.path.join(base_path, relative_path)
@@ -223,61 +295,57 @@ def is_project_root_directory_valid():
     return os.path.isdir(get_project_root_directory())
 
 
+@functools.cache
 def get_git_lfs_path():
     """
     Returns the path to Git-LFS executable. This must always be executed in the project root
     directory if a custom Git-LFS executable was specified, and it is somewhere inside the project
-    root.
+    root. Failures are not cached, so a lookup may succeed later once the user fixed their setup.
     """
-    if not hasattr(get_git_lfs_path, "git_lfs_path"):
-        custom_git_lfs_path = Settings.custom_git_lfs_path
-        project_root = get_project_root_directory()
+    custom_git_lfs_path = Settings.custom_git_lfs_path
+    project_root = get_project_root_directory()
 
-        platform = get_platform()
-
-        # Use custom LFS if provided via settings.ini
-        if len(custom_git_lfs_path) > 0:
-            # Verify executable for Windows
-            if platform == Platform.WINDOWS:
-                if os.path.isfile(project_root + custom_git_lfs_path + ".exe"):
-                    get_git_lfs_path.git_lfs_path = os.path.normpath(
-                        os.path.join(project_root, custom_git_lfs_path) + ".exe")
-            # Verify executable for Linux
-            elif platform == Platform.LINUX:
-                if os.path.isfile(project_root + custom_git_lfs_path):
-                    get_git_lfs_path.git_lfs_path = os.path.join(project_root,
-                                                                 custom_git_lfs_path)
-            else:
-                raise PlatformError()
-        else:
-            # Verify that the default git-lfs command exists
-            default_git_lfs_executable = "git-lfs"
-
-            git_lfs_executable = shutil.which(default_git_lfs_executable)
-            if git_lfs_executable is None:
-                raise GitLfsExecutableError()
+    platform = get_platform()
 
-            try:
-                subprocess.run([default_git_lfs_executable, '--version'],
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE, check=True)
-                get_git_lfs_path.git_lfs_path = default_git_lfs_executable
-            except subprocess.CalledProcessError as e:
-                raise GitLfsExecutableError() from e
+    # Use custom LFS if provided via settings.ini
+    if len(custom_git_lfs_path) > 0:
+        # Only the executable suffix differs per platform
+        if platform == Platform.WINDOWS:
+            custom_git_lfs_path += ".exe"
+        elif platform != Platform.LINUX:
+            raise PlatformError()
+
+        # Join and normalize exactly once; the previous string concatenation produced a
+        # broken path whenever the setting did not start with a separator
+        full_path = os.path.normpath(os.path.join(project_root, custom_git_lfs_path))
+
+        if not os.path.isfile(full_path):
+            raise GitLfsExecutableError()
+
+        return full_path
+
+    # Verify that the default git-lfs command exists. shutil.which() already checks that the
+    # file exists and is executable, so spawning 'git-lfs --version' on top of that would only
+    # slow down startup.
+    default_git_lfs_executable = "git-lfs"
+
+    if shutil.which(default_git_lfs_executable) is None:
+        raise GitLfsExecutableError()
 
-    return get_git_lfs_path.git_lfs_path
+    return default_git_lfs_executable
 
 
+@functools.cache
 def get_project_root_directory():
     """
     This function retrieves the project root directory, i.e. the directory of the Git-LFS-enabled
-    repository. The path must be specified in the user settings.
+    repository. The path must be specified in the user settings. The resolved path is cached
+    because the function is called from several hot paths.
     :return: Returns the project root directory
     """
     full_path = os.path.join(os.getcwd(), Settings.project_root_directory)
     full_path = os.path.normpath(full_path)
-    full_path = os.path.join(full_path, '')
-    return full_path
+    return os.path.join(full_path, '')
 
 
 class Platform(Enum):
@@ -286,9 +354,11 @@ class Platform(Enum):
     LINUX = 2
 
 
+@functools.cache
 def get_platform():
     """
-    This function retrieves the current platform the application is run on.
+    This function retrieves the current platform the application is run on. The platform cannot
+    change at runtime, so the string checks run at most once.
     :return: Returns the current platform
     """
     if sys.platform.startswith('win'):
@@ -297,4 +367,4 @@ def get_platform():
     if sys.platform.startswith('linux'):
         return Platform.LINUX
 
-    raise ValueError("Platform is not supported")
+    raise PlatformError()
@@ -1,8 +1,9 @@
 """ This module implements async worker threads for various tasks. """
+import os
 import sys
 import traceback
 
-from PyQt5.QtCore import pyqtSignal, QRunnable, QThreadPool, pyqtSlot, QObject
+from PyQt5.QtCore import pyqtSignal, QRunnable, QThreadPool, QObject
 
 
 # Code from: https://www.pythonguis.com/tutorials/multithreading-pyqt-applications-qthreadpool/
@@ -18,9 +19,15 @@ class WorkerSignals(QObject):
 
 class WorkerThread(QRunnable):
     """
-    Inherits from QRunnable to handler worker thread setup, signals and wrap-up.
+    Inherits from QRunnable to handler worker thread setup, signals and wrap-up. Submitted work
+    is assumed to be IO-bound (waiting on git subprocesses), which is why the pool is sized
+    beyond the core count below.
     """
-    _shared_thread_pool = QThreadPool()
+    _shared_thread_pool = QThreadPool.globalInstance()
+
+    # The default max equals the CPU count, which needlessly serializes workers that spend
+    # their time blocked on subprocess IO rather than computing
+    _shared_thread_pool.setMaxThreadCount(min(32, (os.cpu_count() or 1) * 4))
 
     def __init__(self, fn, *args, **kwargs):
         super().__init__()
@@ -31,7 +38,6 @@ class WorkerThread(QRunnable):
         self._kwargs = kwargs
         self._signals = WorkerSignals()
 
-    @pyqtSlot()
     def run(self):
         """
         Initialise the runner function with passed args, kwargs.